@@ -388,42 +388,55 @@ class Process(object):
              'is_running', 'as_dict', 'parent', 'children', 'rlimit'])
         retdict = dict()
         ls = set(attrs or [x for x in dir(self) if not x.startswith('get')])
-        for name in ls:
-            if name.startswith('_'):
-                continue
-            if name.startswith('set_'):
-                continue
-            if name.startswith('get_'):
-                msg = "%s() is deprecated; use %s() instead" % (name, name[4:])
-                warnings.warn(msg, category=DeprecationWarning, stacklevel=2)
-                name = name[4:]
-                if name in ls:
+        # on Linux this enables a short-lived cache of the parsed
+        # /proc/[pid] files so that each file is read and parsed
+        # once per as_dict() call instead of once per attribute
+        cache_enter = getattr(_psplatform, "proc_cache_enter", None)
+        if cache_enter is not None:
+            cache_enter()
+        try:
+            for name in ls:
+                if name.startswith('_'):
                     continue
-            if name == 'getcwd':
-                msg = "getcwd() is deprecated; use cwd() instead"
-                warnings.warn(msg, category=DeprecationWarning, stacklevel=2)
-                name = 'cwd'
-                if name in ls:
+                if name.startswith('set_'):
                     continue
-
-            if name in excluded_names:
-                continue
-            try:
-                attr = getattr(self, name)
-                if callable(attr):
-                    ret = attr()
-                else:
-                    ret = attr
-            except AccessDenied:
-                ret = ad_value
-            except NotImplementedError:
-                # in case of not implemented functionality (may happen
-                # on old or exotic systems) we want to crash only if
-                # the user explicitly asked for that particular attr
-                if attrs:
-                    raise
-                continue
-            retdict[name] = ret
+                if name.startswith('get_'):
+                    msg = "%s() is deprecated; use %s() instead" % (
+                        name, name[4:])
+                    warnings.warn(msg, category=DeprecationWarning,
+                                  stacklevel=2)
+                    name = name[4:]
+                    if name in ls:
+                        continue
+                if name == 'getcwd':
+                    msg = "getcwd() is deprecated; use cwd() instead"
+                    warnings.warn(msg, category=DeprecationWarning,
+                                  stacklevel=2)
+                    name = 'cwd'
+                    if name in ls:
+                        continue
+
+                if name in excluded_names:
+                    continue
+                try:
+                    attr = getattr(self, name)
+                    if callable(attr):
+                        ret = attr()
+                    else:
+                        ret = attr
+                except AccessDenied:
+                    ret = ad_value
+                except NotImplementedError:
+                    # in case of not implemented functionality (may happen
+                    # on old or exotic systems) we want to crash only if
+                    # the user explicitly asked for that particular attr
+                    if attrs:
+                        raise
+                    continue
+                retdict[name] = ret
+        finally:
+            if cache_enter is not None:
+                _psplatform.proc_cache_exit()
         return retdict
 
     def parent(self):
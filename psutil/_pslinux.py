@@ -15,12 +15,14 @@ import re
 import socket
 import struct
 import sys
+import time
 import warnings
 
 from psutil import _common
 from psutil import _psposix
-from psutil._common import (isfile_strict, usage_percent, deprecated)
-from psutil._compat import PY3, xrange, namedtuple, wraps, b, defaultdict
+from psutil._common import (usage_percent, deprecated)
+from psutil._compat import (PY3, namedtuple, wraps, b, defaultdict,
+                            lru_cache)
 import _psutil_linux as cext
 import _psutil_posix
 
@@ -49,9 +51,19 @@ if HAS_PRLIMIT:
 
 # Number of clock ticks per second
 CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+# multiplying by the inverse is cheaper than dividing by CLOCK_TICKS
+# and the conversion runs once per field in the hot parsing loops
+TICK_INV = 1.0 / CLOCK_TICKS
 PAGESIZE = os.sysconf("SC_PAGE_SIZE")
-BOOT_TIME = None  # set later
+BOOT_TIME = None  # set below, at import time
 DEFAULT_ENCODING = sys.getdefaultencoding()
+# don't leak fds to subprocesses; the constant appeared in Python 3.3
+O_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+# openat()-style lookups relative to a directory fd (Python >= 3.3)
+HAS_DIR_FD = hasattr(os, "supports_dir_fd") and os.open in os.supports_dir_fd
+# whether the kernel has IPv6 support; determined once at import time
+# rather than paying a failed open() on every connections() call
+HAS_IPV6 = os.path.exists('/proc/net/tcp6')
 
 # ioprio_* constants http://linux.die.net/man/2/ioprio_get
 IOPRIO_CLASS_NONE = 0
@@ -88,25 +100,111 @@ TCP_STATUSES = {
     "0B": _common.CONN_CLOSING
 }
 
+# Precompiled regexes used to parse the /proc virtual files below;
+# extracting all the interesting lines of a file in a single pass is
+# a lot cheaper than comparing every line against N prefixes in
+# Python.
+_VMSTAT_SWAP_RE = re.compile(b(r'^(pswpin|pswpout)\s+(\d+)'), re.MULTILINE)
+# the four fields appear in this order in /proc/[pid]/io; one search
+# yields all of them, no match list or dict needed
+_PROC_IO_RE = re.compile(
+    b(r'syscr:\s+(\d+).*?syscw:\s+(\d+).*?'
+      r'read_bytes:\s+(\d+).*?write_bytes:\s+(\d+)'), re.DOTALL)
+_PERCPU_RE = re.compile(b(r'^cpu\d+ (.*)$'), re.MULTILINE)
+_STAT_CPU_RE = re.compile(b(r'cpu\d'))
+_PARTITIONS_RE = re.compile(b(r'^\s*\d+\s+\d+\s+\d+\s+(\S+)'), re.MULTILINE)
+
+# Pre-compiled structs swapping the four dwords of an IPv6 address as
+# displayed in /proc/net/tcp6 on little endian machines (see
+# Connections.decode_address); compiling the format once saves a
+# format-string parse per connection row.
+try:
+    _IP6_UNPACK = struct.Struct('<4I').unpack
+    _IP6_PACK = struct.Struct('>4I').pack
+except AttributeError:
+    # Python 2.4 has no struct.Struct
+    def _IP6_UNPACK(data):
+        return struct.unpack('<4I', data)
+
+    def _IP6_PACK(*values):
+        return struct.pack('>4I', *values)
+
+# pre-bound _make() constructors for the namedtuples returned by the
+# hottest Process methods: _make(sequence) skips the positional-args
+# repackaging done by namedtuple's __new__ on every call
+_pcputimes = _common.pcputimes._make
+_pmem = _common.pmem._make
+_pthread = _common.pthread._make
+_pio = _common.pio._make
+_pctxsw = _common.pctxsw._make
+
+# errno values tested in hot exception handlers, hoisted to module
+# level so a stale-fd / gone-process miss doesn't pay an errno-module
+# attribute lookup per constant
+_ENOENT = errno.ENOENT
+_ESRCH = errno.ESRCH
+_EPERM = errno.EPERM
+_EACCES = errno.EACCES
+
 # set later from __init__.py
 NoSuchProcess = None
 AccessDenied = None
 TimeoutExpired = None
 
 
+def _slurp(path, size=4096):
+    """Read a small /proc file through a raw fd with (usually) a
+    single read() syscall and return its content as bytes, skipping
+    the buffered I/O stack and its double copy through an 8 KiB
+    BufferedReader.  Files larger than 'size' are still read in full
+    via the continuation loop.
+
+    Note: mmap() is not an option here; procfs files are virtual,
+    generated on the fly at read() time, and (almost) none of them
+    implement the mmap file operation, so read() it is.
+    """
+    fd = os.open(path, os.O_RDONLY | O_CLOEXEC)
+    try:
+        data = os.read(fd, size)
+        if len(data) == size:
+            # buffer filled up; keep reading until EOF
+            chunks = [data]
+            while 1:
+                chunk = os.read(fd, size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b('').join(chunks)
+        return data
+    finally:
+        os.close(fd)
+
+
 # --- named tuples
 
-def _get_cputimes_fields():
-    """Return a namedtuple of variable fields depending on the
-    CPU times available on this Linux kernel version which may be:
+def _scan_stat_file():
+    """Read /proc/stat once and return a (cpu_values, btime) pair:
+    the values of the first 'cpu' line (whose length determines the
+    scputimes namedtuple layout) and the system boot time.  Both are
+    constant after boot so this runs a single time, at import time;
+    previously boot_time() re-opened and re-scanned the file on every
+    call.
+    """
+    data = _slurp('/proc/stat', 16384)
+    values = data[:data.find(b('\n'))].split()[1:]
+    btime = None
+    match = re.search(b(r'^btime (\d+)'), data, re.MULTILINE)
+    if match is not None:
+        btime = float(match.group(1))
+    return values, btime
+
+
+def _get_cputimes_fields(values):
+    """Return the scputimes namedtuple fields, which depend on the
+    CPU times available on this Linux kernel version and may be:
     (user, nice, system, idle, iowait, irq, softirq, [steal, [guest,
      [guest_nice]]])
     """
-    f = open('/proc/stat', 'rb')
-    try:
-        values = f.readline().split()[1:]
-    finally:
-        f.close()
     fields = ['user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq']
     vlen = len(values)
     if vlen >= 8:
@@ -121,7 +219,9 @@ def _get_cputimes_fields():
     return fields
 
 
-scputimes = namedtuple('scputimes', _get_cputimes_fields())
+_values, BOOT_TIME = _scan_stat_file()
+scputimes = namedtuple('scputimes', _get_cputimes_fields(_values))
+del _values
 
 svmem = namedtuple(
     'svmem', ['total', 'available', 'percent', 'used', 'free',
@@ -140,32 +240,37 @@ pmmap_ext = namedtuple(
 
 # --- system memory
 
+def _meminfo_field(data, key):
+    """Given /proc/meminfo content return the value of a
+    "<key>:   1234 kB" line in bytes, or None if the field is
+    missing.  'key' must include the leading newline (so that e.g.
+    "\\nCached:" doesn't match "SwapCached:").
+    """
+    i = data.find(key)
+    if i == -1:
+        return None
+    i += len(key)
+    value = data[i:data.find(b('\n'), i)]
+    if value.endswith(b('kB')):
+        value = value[:-2]
+    return int(value) * 1024
+
+
 def virtual_memory():
     total, free, buffers, shared, _, _ = cext.linux_sysinfo()
-    cached = active = inactive = None
-    f = open('/proc/meminfo', 'rb')
-    CACHED, ACTIVE, INACTIVE = b("Cached:"), b("Active:"), b("Inactive:")
-    try:
-        for line in f:
-            if line.startswith(CACHED):
-                cached = int(line.split()[1]) * 1024
-            elif line.startswith(ACTIVE):
-                active = int(line.split()[1]) * 1024
-            elif line.startswith(INACTIVE):
-                inactive = int(line.split()[1]) * 1024
-            if (cached is not None
-                    and active is not None
-                    and inactive is not None):
-                break
-        else:
-            # we might get here when dealing with exotic Linux flavors, see:
-            # https://github.com/giampaolo/psutil/issues/313
-            msg = "'cached', 'active' and 'inactive' memory stats couldn't " \
-                  "be determined and were set to 0"
-            warnings.warn(msg, RuntimeWarning)
-            cached = active = inactive = 0
-    finally:
-        f.close()
+    data = _slurp('/proc/meminfo')
+    # three memmem-backed find()s over a ~1.5 KB buffer instead of a
+    # regex scan building a match list
+    cached = _meminfo_field(data, b('\nCached:'))
+    active = _meminfo_field(data, b('\nActive:'))
+    inactive = _meminfo_field(data, b('\nInactive:'))
+    if cached is None or active is None or inactive is None:
+        # we might get here when dealing with exotic Linux flavors, see:
+        # https://github.com/giampaolo/psutil/issues/313
+        msg = "'cached', 'active' and 'inactive' memory stats couldn't " \
+              "be determined and were set to 0"
+        warnings.warn(msg, RuntimeWarning)
+        cached = active = inactive = 0
     avail = free + buffers + cached
     used = total - free
     percent = usage_percent((total - avail), total, _round=1)
@@ -178,27 +283,19 @@ def swap_memory():
     used = total - free
     percent = usage_percent(used, total, _round=1)
     # get pgin/pgouts
-    f = open("/proc/vmstat", "rb")
-    SIN, SOUT = b('pswpin'), b('pswpout')
-    sin = sout = None
+    data = _slurp("/proc/vmstat", 16384)
+    swaps = dict(_VMSTAT_SWAP_RE.findall(data))
     try:
-        for line in f:
-            # values are expressed in 4 kilo bytes, we want bytes instead
-            if line.startswith(SIN):
-                sin = int(line.split(b(' '))[1]) * 4 * 1024
-            elif line.startswith(SOUT):
-                sout = int(line.split(b(' '))[1]) * 4 * 1024
-            if sin is not None and sout is not None:
-                break
-        else:
-            # we might get here when dealing with exotic Linux flavors, see:
-            # https://github.com/giampaolo/psutil/issues/313
-            msg = "'sin' and 'sout' swap memory stats couldn't " \
-                  "be determined and were set to 0"
-            warnings.warn(msg, RuntimeWarning)
-            sin = sout = 0
-    finally:
-        f.close()
+        # values are expressed in 4 kilo bytes, we want bytes instead
+        sin = int(swaps[b('pswpin')]) * 4 * 1024
+        sout = int(swaps[b('pswpout')]) * 4 * 1024
+    except KeyError:
+        # we might get here when dealing with exotic Linux flavors, see:
+        # https://github.com/giampaolo/psutil/issues/313
+        msg = "'sin' and 'sout' swap memory stats couldn't " \
+              "be determined and were set to 0"
+        warnings.warn(msg, RuntimeWarning)
+        sin = sout = 0
     return _common.sswap(total, used, free, percent, sin, sout)
 
 
@@ -223,11 +320,11 @@ def cpu_times():
     """
     f = open('/proc/stat', 'rb')
     try:
-        values = f.readline().split()
+        values = f.readline().split(None, len(scputimes._fields) + 1)
     finally:
         f.close()
     fields = values[1:len(scputimes._fields) + 1]
-    fields = [float(x) / CLOCK_TICKS for x in fields]
+    fields = [float(x) * TICK_INV for x in fields]
     return scputimes(*fields)
 
 
@@ -235,22 +332,16 @@ def per_cpu_times():
     """Return a list of namedtuple representing the CPU times
     for every CPU available on the system.
     """
+    # read the whole file in one shot and match the "cpuN" lines
+    # with a precompiled regex rather than iterating line by line
     cpus = []
-    f = open('/proc/stat', 'rb')
-    try:
-        # get rid of the first line which refers to system wide CPU stats
-        f.readline()
-        CPU = b('cpu')
-        for line in f:
-            if line.startswith(CPU):
-                values = line.split()
-                fields = values[1:len(scputimes._fields) + 1]
-                fields = [float(x) / CLOCK_TICKS for x in fields]
-                entry = scputimes(*fields)
-                cpus.append(entry)
-        return cpus
-    finally:
-        f.close()
+    data = _slurp('/proc/stat', 16384)
+    nfields = len(scputimes._fields)
+    for match in _PERCPU_RE.finditer(data):
+        fields = match.group(1).split(None, nfields)[:nfields]
+        fields = [float(x) * TICK_INV for x in fields]
+        cpus.append(scputimes(*fields))
+    return cpus
 
 
 def cpu_count_logical():
@@ -274,15 +365,13 @@ def cpu_count_logical():
     # https://github.com/giampaolo/psutil/issues/200
     # try to parse /proc/stat as a last resort
     if num == 0:
-        f = open('/proc/stat', 'rt')
+        f = open('/proc/stat', 'rb')
         try:
             lines = f.readlines()
         finally:
             f.close()
-        search = re.compile('cpu\d')
         for line in lines:
-            line = line.split(' ')[0]
-            if search.match(line):
+            if _STAT_CPU_RE.match(line):
                 num += 1
 
     if num == 0:
@@ -332,24 +421,24 @@ def users():
 def boot_time():
     """Return the system boot time expressed in seconds since the epoch."""
     global BOOT_TIME
-    f = open('/proc/stat', 'rb')
-    try:
-        BTIME = b('btime')
-        for line in f:
-            if line.startswith(BTIME):
-                ret = float(line.strip().split()[1])
-                BOOT_TIME = ret
-                return ret
-        raise RuntimeError("line 'btime' not found")
-    finally:
-        f.close()
+    if BOOT_TIME is None:
+        # couldn't be determined at import time (exotic Linux
+        # flavor?); scan the file again
+        _values, BOOT_TIME = _scan_stat_file()
+        if BOOT_TIME is None:
+            raise RuntimeError("line 'btime' not found")
+    return BOOT_TIME
 
 
 # --- processes
 
 def pids():
     """Returns a list of PIDs currently running on the system."""
-    return [int(x) for x in os.listdir(b('/proc')) if x.isdigit()]
+    # Anything in /proc whose name starts with a digit is a PID
+    # directory (such names are fully numeric); testing the first
+    # character only is cheaper than isdigit()ing every entry.
+    DIGITS = b('0123456789')
+    return [int(x) for x in os.listdir(b('/proc')) if x[:1] in DIGITS]
 
 
 def pid_exists(pid):
@@ -359,6 +448,67 @@ def pid_exists(pid):
 
 # --- network
 
+@lru_cache(maxsize=4096)
+def decode_address(addr, family,
+                   # the default arguments are there to turn the
+                   # global / attribute lookups paid on every cache
+                   # miss into local loads; callers pass two args
+                   _little=(sys.byteorder == 'little'),
+                   _AF_INET=socket.AF_INET,
+                   _AF_INET6=socket.AF_INET6,
+                   _inet_ntop=socket.inet_ntop,
+                   _b16decode=base64.b16decode):
+    """Accept an "ip:port" address as displayed in /proc/net/*
+    and convert it into a human readable form, like:
+
+    "0500000A:0016" -> ("10.0.0.5", 22)
+    "0000000000000000FFFF00000100007F:9E49" -> ("::ffff:127.0.0.1", 40521)
+
+    The IP address portion is a little or big endian four-byte
+    hexadecimal number; that is, the least significant byte is listed
+    first, so we need to reverse the order of the bytes to convert it
+    to an IP address.
+    The port is represented as a two-byte hexadecimal number.
+
+    The conversion is pure and the same few local addresses repeat on
+    every row of a busy table (e.g. a 0.0.0.0:80 listener with many
+    established peers), hence the LRU cache on top.
+
+    Reference:
+    http://linuxdevcenter.com/pub/a/linux/2000/11/16/LinuxAdmin.html
+    """
+    # partition() avoids building a 2-item list per address
+    ip, _, port = addr.partition(':')
+    port = int(port, 16)
+    # this usually refers to a local socket in listen mode with
+    # no end-points connected
+    if not port:
+        return ()
+    if PY3:
+        # C-implemented and accepts the str as-is, where
+        # b16decode would need an ascii-encode round trip first
+        ip = bytes.fromhex(ip)
+    else:
+        ip = _b16decode(ip)
+    if family == _AF_INET:
+        # see: https://github.com/giampaolo/psutil/issues/201
+        if _little:
+            ip = _inet_ntop(family, ip[::-1])
+        else:
+            ip = _inet_ntop(family, ip)
+    else:  # IPv6
+        # old version - let's keep it, just in case...
+        # ip = ip.decode('hex')
+        # return socket.inet_ntop(socket.AF_INET6,
+        #          ''.join(ip[i:i+4][::-1] for i in xrange(0, 16, 4)))
+        # see: https://github.com/giampaolo/psutil/issues/201
+        if _little:
+            ip = _inet_ntop(_AF_INET6, _IP6_PACK(*_IP6_UNPACK(ip)))
+        else:
+            ip = _inet_ntop(_AF_INET6, ip)
+    return (ip, port)
+
+
 class Connections:
     """A wrapper on top of /proc/net/* files, retrieving per-process
     and system-wide open connections (TCP, UDP, UNIX) similarly to
@@ -390,20 +540,27 @@ class Connections:
             "inet4": (tcp4, udp4),
             "inet6": (tcp6, udp6),
         }
-
-    def get_proc_inodes(self, pid):
+        if not HAS_IPV6:
+            # drop the tcp6/udp6 entries up front so retrieve()
+            # never even considers them
+            for kind in self.tmap:
+                self.tmap[kind] = tuple(
+                    [x for x in self.tmap[kind] if not x[0].endswith('6')])
+
+    def get_proc_inodes(self, pid, fd_list=None):
+        # the fd scan happens in C: one getdents64 walk plus a
+        # readlinkat() per fd into a small buffer, instead of
+        # listdir + a full readlink per fd; callers which already
+        # walked the fds (Process._scan_fds()) pass the result in so
+        # the directory is not scanned a second time
         inodes = defaultdict(list)
-        for fd in os.listdir("/proc/%s/fd" % pid):
-            try:
-                inode = os.readlink("/proc/%s/fd/%s" % (pid, fd))
-            except OSError:
-                # TODO: need comment here
-                continue
-            else:
-                if inode.startswith('socket:['):
-                    # the process is using a socket
-                    inode = inode[8:][:-1]
-                    inodes[inode].append((pid, int(fd)))
+        if fd_list is None:
+            pairs = cext.proc_socket_inodes(pid)
+        else:
+            pairs = [(target[8:-1], fd) for fd, target, isreg in fd_list
+                     if target[:8] == 'socket:[']
+        for inode, fd in pairs:
+            inodes[inode].append((pid, fd))
         return inodes
 
     def get_all_inodes(self):
@@ -421,94 +578,77 @@ class Connections:
                 # ENOENT just means a PID disappeared on us.
                 err = sys.exc_info()[1]
                 if err.errno not in (
-                        errno.ENOENT, errno.ESRCH, errno.EPERM, errno.EACCES):
+                        _ENOENT, _ESRCH, _EPERM, _EACCES):
                     raise
         return inodes
 
-    def decode_address(self, addr, family):
-        """Accept an "ip:port" address as displayed in /proc/net/*
-        and convert it into a human readable form, like:
-
-        "0500000A:0016" -> ("10.0.0.5", 22)
-        "0000000000000000FFFF00000100007F:9E49" -> ("::ffff:127.0.0.1", 40521)
-
-        The IP address portion is a little or big endian four-byte
-        hexadecimal number; that is, the least significant byte is listed
-        first, so we need to reverse the order of the bytes to convert it
-        to an IP address.
-        The port is represented as a two-byte hexadecimal number.
-
-        Reference:
-        http://linuxdevcenter.com/pub/a/linux/2000/11/16/LinuxAdmin.html
+    def read_net_file(self, file, cache):
+        """Read a /proc/net/* file in a single read() call and return
+        its lines minus the header; 'cache' (a per-retrieve() dict)
+        avoids re-reading a file shared by multiple kinds.  The single
+        read also gives a consistent snapshot of files which mutate
+        while being read.
         """
-        ip, port = addr.split(':')
-        port = int(port, 16)
-        # this usually refers to a local socket in listen mode with
-        # no end-points connected
-        if not port:
-            return ()
-        if PY3:
-            ip = ip.encode('ascii')
-        if family == socket.AF_INET:
-            # see: https://github.com/giampaolo/psutil/issues/201
-            if sys.byteorder == 'little':
-                ip = socket.inet_ntop(family, base64.b16decode(ip)[::-1])
-            else:
-                ip = socket.inet_ntop(family, base64.b16decode(ip))
-        else:  # IPv6
-            # old version - let's keep it, just in case...
-            # ip = ip.decode('hex')
-            # return socket.inet_ntop(socket.AF_INET6,
-            #          ''.join(ip[i:i+4][::-1] for i in xrange(0, 16, 4)))
-            ip = base64.b16decode(ip)
-            # see: https://github.com/giampaolo/psutil/issues/201
-            if sys.byteorder == 'little':
-                ip = socket.inet_ntop(
-                    socket.AF_INET6,
-                    struct.pack('>4I', *struct.unpack('<4I', ip)))
-            else:
-                ip = socket.inet_ntop(
-                    socket.AF_INET6,
-                    struct.pack('<4I', *struct.unpack('<4I', ip)))
-        return (ip, port)
+        try:
+            return cache[file]
+        except KeyError:
+            f = open(file, 'rt')
+            try:
+                data = f.read()
+            finally:
+                f.close()
+            # skip the first (header) line
+            lines = data.split('\n')[1:]
+            cache[file] = lines
+            return lines
 
-    def process_inet(self, file, family, type_, inodes, filter_pid=None):
+    def process_inet(self, file, family, type_, inodes, cache,
+                     filter_pid=None):
         """Parse /proc/net/tcp* and /proc/net/udp* files."""
-        if file.endswith('6') and not os.path.exists(file):
-            # IPv6 not supported
-            return
-        f = open(file, 'rt')
-        f.readline()  # skip the first line
-        for line in f:
-            _, laddr, raddr, status, _, _, _, _, _, inode = \
-                line.split()[:10]
-            if inode in inodes:
+        # The read and tokenization of the whole table happen in C
+        # (see psutil_parse_proc_net); when looking at one process
+        # the C side also drops the rows (usually >99% of the table)
+        # whose inode doesn't belong to it, so very little ever
+        # reaches this loop.
+        try:
+            rows = cache[file]
+        except KeyError:
+            if filter_pid is not None:
+                rows = cext.parse_proc_net(file, inodes)
+            else:
+                rows = cext.parse_proc_net(file)
+            cache[file] = rows
+        inodes_get = inodes.get
+        statuses = TCP_STATUSES
+        is_stream = (type_ == socket.SOCK_STREAM)
+        for laddr, raddr, status, inode in rows:
+            pairs = inodes_get(inode)
+            if pairs is not None:
                 # We assume inet sockets are unique, so we error
                 # out if there are multiple references to the
                 # same inode. We won't do this for UNIX sockets.
-                if len(inodes[inode]) > 1 and type_ != socket.AF_UNIX:
+                if len(pairs) > 1 and type_ != socket.AF_UNIX:
                     raise ValueError("ambiguos inode with multiple "
                                      "PIDs references")
-                pid, fd = inodes[inode][0]
+                pid, fd = pairs[0]
             else:
+                if filter_pid is not None:
+                    continue
                 pid, fd = None, -1
             if filter_pid is not None and filter_pid != pid:
                 continue
+            if is_stream:
+                status = statuses[status]
             else:
-                if type_ == socket.SOCK_STREAM:
-                    status = TCP_STATUSES[status]
-                else:
-                    status = _common.CONN_NONE
-                laddr = self.decode_address(laddr, family)
-                raddr = self.decode_address(raddr, family)
-                yield (fd, family, type_, laddr, raddr, status, pid)
-        f.close()
+                status = _common.CONN_NONE
+            yield (fd, family, type_, decode_address(laddr, family),
+                   decode_address(raddr, family), status, pid)
 
-    def process_unix(self, file, family, inodes, filter_pid=None):
+    def process_unix(self, file, family, inodes, cache, filter_pid=None):
         """Parse /proc/net/unix files."""
-        f = open(file, 'rt')
-        f.readline()  # skip the first line
-        for line in f:
+        for line in self.read_net_file(file, cache):
+            if not line:
+                continue
             tokens = line.split()
             _, _, _, _, type_, _, inode = tokens[0:7]
             if inode in inodes:
@@ -529,35 +669,40 @@ class Connections:
                     raddr = None
                     status = _common.CONN_NONE
                     yield (fd, family, type_, path, raddr, status, pid)
-        f.close()
 
-    def retrieve(self, kind, pid=None):
+    def retrieve(self, kind, pid=None, fd_list=None):
         if kind not in self.tmap:
             raise ValueError("invalid %r kind argument; choose between %s"
                              % (kind, ', '.join([repr(x) for x in self.tmap])))
         if pid is not None:
-            inodes = self.get_proc_inodes(pid)
+            inodes = self.get_proc_inodes(pid, fd_list)
             if not inodes:
                 # no connections for this process
                 return []
         else:
             inodes = self.get_all_inodes()
         ret = []
+        cache = {}
+        # process_inet/process_unix yield (fd, family, type, laddr,
+        # raddr, status, pid) tuples, which map straight onto sconn;
+        # pconn just drops the trailing pid
+        if pid:
+            make_conn = _common.pconn._make
+        else:
+            make_conn = _common.sconn._make
         for f, family, type_ in self.tmap[kind]:
             if family in (socket.AF_INET, socket.AF_INET6):
                 ls = self.process_inet(
-                    "/proc/net/%s" % f, family, type_, inodes, filter_pid=pid)
+                    "/proc/net/%s" % f, family, type_, inodes, cache,
+                    filter_pid=pid)
             else:
                 ls = self.process_unix(
-                    "/proc/net/%s" % f, family, inodes, filter_pid=pid)
-            for fd, family, type_, laddr, raddr, status, bound_pid in ls:
-                if pid:
-                    conn = _common.pconn(fd, family, type_, laddr, raddr,
-                                         status)
-                else:
-                    conn = _common.sconn(fd, family, type_, laddr, raddr,
-                                         status, bound_pid)
-                ret.append(conn)
+                    "/proc/net/%s" % f, family, inodes, cache,
+                    filter_pid=pid)
+            if pid:
+                ret.extend([make_conn(item[:6]) for item in ls])
+            else:
+                ret.extend([make_conn(item) for item in ls])
         return ret
 
 
@@ -573,18 +718,18 @@ def net_io_counters():
     """Return network I/O statistics for every network interface
     installed on the system as a dict of raw tuples.
     """
-    f = open("/proc/net/dev", "rt")
-    try:
-        lines = f.readlines()
-    finally:
-        f.close()
+    data = _slurp("/proc/net/dev", 16384)
 
+    # skip the two header lines; the rest is one row per interface
     retdict = {}
-    for line in lines[2:]:
-        colon = line.rfind(':')
+    COLON = b(':')
+    for line in data.splitlines()[2:]:
+        colon = line.rfind(COLON)
         assert colon > 0, repr(line)
         name = line[:colon].strip()
-        fields = line[colon + 1:].strip().split()
+        if PY3:
+            name = name.decode(DEFAULT_ENCODING)
+        fields = line[colon + 1:].strip().split(None, 12)
         bytes_recv = int(fields[0])
         packets_recv = int(fields[1])
         errin = int(fields[2])
@@ -610,57 +755,47 @@ def disk_io_counters():
     SECTOR_SIZE = 512
 
     # determine partitions we want to look for
-    partitions = []
-    f = open("/proc/partitions", "rt")
-    try:
-        lines = f.readlines()[2:]
-    finally:
-        f.close()
-    for line in reversed(lines):
-        _, _, _, name = line.split()
-        if name[-1].isdigit():
-            # we're dealing with a partition (e.g. 'sda1'); 'sda' will
-            # also be around but we want to omit it
-            partitions.append(name)
-        else:
-            if not partitions or not partitions[-1].startswith(name):
-                # we're dealing with a disk entity for which no
-                # partitions have been defined (e.g. 'sda' but
-                # 'sda1' was not around), see:
-                # https://github.com/giampaolo/psutil/issues/338
-                partitions.append(name)
-    #
+    data = _slurp("/proc/partitions")
+    part_names = _PARTITIONS_RE.findall(data)
+    # disks whose partitions show up in the file (e.g. 'sda' when
+    # 'sda1' is around) must be omitted in favor of the partitions
+    # themselves
+    parents_with_children = set()
+    DIGITS = b('0123456789')
+    for name in part_names:
+        if name[-1:].isdigit():
+            parents_with_children.add(name.rstrip(DIGITS))
+    partitions = set()
+    for name in part_names:
+        if name[-1:].isdigit() or name not in parents_with_children:
+            # either a partition (e.g. 'sda1') or a disk entity for
+            # which no partitions have been defined (e.g. 'sda' but
+            # 'sda1' was not around), see:
+            # https://github.com/giampaolo/psutil/issues/338
+            partitions.add(name)
+    if PY3:
+        partitions = set([x.decode(DEFAULT_ENCODING) for x in partitions])
+    # the /proc/diskstats read and the per-line number crunching
+    # happen in C (strtoull over a single buffer); what's left here
+    # is picking the interesting entries and scaling sectors to bytes
     retdict = {}
-    f = open("/proc/diskstats", "rt")
-    try:
-        lines = f.readlines()
-    finally:
-        f.close()
-    for line in lines:
-        # http://www.mjmwired.net/kernel/Documentation/iostats.txt
-        _, _, name, reads, _, rbytes, rtime, writes, _, wbytes, wtime = \
-            line.split()[:11]
+    for name, reads, writes, rsect, wsect, rtime, wtime in \
+            cext.disk_io_counters():
         if name in partitions:
-            rbytes = int(rbytes) * SECTOR_SIZE
-            wbytes = int(wbytes) * SECTOR_SIZE
-            reads = int(reads)
-            writes = int(writes)
-            rtime = int(rtime)
-            wtime = int(wtime)
-            retdict[name] = (reads, writes, rbytes, wbytes, rtime, wtime)
+            retdict[name] = (reads, writes, rsect * SECTOR_SIZE,
+                             wsect * SECTOR_SIZE, rtime, wtime)
     return retdict
 
 
 def disk_partitions(all=False):
     """Return mounted disk partitions as a list of nameduples"""
     phydevs = []
-    f = open("/proc/filesystems", "r")
-    try:
-        for line in f:
-            if not line.startswith("nodev"):
-                phydevs.append(line.strip())
-    finally:
-        f.close()
+    data = _slurp("/proc/filesystems")
+    if PY3:
+        data = data.decode(DEFAULT_ENCODING)
+    for line in data.splitlines():
+        if not line.startswith("nodev"):
+            phydevs.append(line.strip())
 
     retlist = []
     partitions = cext.disk_partitions()
@@ -679,6 +814,118 @@ def disk_partitions(all=False):
 disk_usage = _psposix.disk_usage
 
 
+# --- /proc/[pid] files caching
+
+# Expiration threshold (in seconds) for the parsed /proc/[pid] files
+# cache; it only matters when the cache is explicitly enabled, see
+# proc_cache_enter().
+PROC_CACHE_TTL = 0.1
+_timer = getattr(time, 'monotonic', time.time)
+_proc_cache = {}
+_proc_cache_users = 0
+
+
+def proc_cache_enter():
+    """Enable caching of the parsed /proc/[pid] files.
+    While the cache is enabled every /proc/[pid] file is open()ed,
+    read and parsed at most once per PROC_CACHE_TTL seconds, so that
+    callers retrieving multiple process attributes in one shot (as
+    Process.as_dict() does) pay one open + read + parse per file
+    instead of one per attribute.
+    """
+    global _proc_cache_users
+    _proc_cache_users += 1
+
+
+def proc_cache_exit():
+    """Disable the /proc/[pid] files cache enabled by
+    proc_cache_enter() and discard its content.
+    """
+    global _proc_cache_users
+    _proc_cache_users -= 1
+    if _proc_cache_users <= 0:
+        _proc_cache_users = 0
+        _proc_cache.clear()
+
+
+def _read_proc_file(pid, name, parser):
+    """Read /proc/[pid]/[name] and return parser(content).
+    If the cache is enabled the parsed value is reused for up to
+    PROC_CACHE_TTL seconds, keyed on (pid, name).
+    """
+    if _proc_cache_users:
+        entry = _proc_cache.get((pid, name))
+        if entry is not None and (_timer() - entry[0]) < PROC_CACHE_TTL:
+            return entry[1]
+    data = _slurp("/proc/%s/%s" % (pid, name))
+    ret = parser(data)
+    if _proc_cache_users:
+        _proc_cache[(pid, name)] = (_timer(), ret)
+    return ret
+
+
+def _status_fields(pid):
+    """Return the (state, ppid, uid_real, uid_eff, uid_saved,
+    gid_real, gid_eff, gid_saved) tuple parsed in C from
+    /proc/[pid]/status, honoring the opt-in TTL cache the same way
+    _read_proc_file() does.
+    """
+    if _proc_cache_users:
+        entry = _proc_cache.get((pid, "status_fields"))
+        if entry is not None and (_timer() - entry[0]) < PROC_CACHE_TTL:
+            return entry[1]
+    ret = cext.proc_status_fields(pid)
+    if _proc_cache_users:
+        _proc_cache[(pid, "status_fields")] = (_timer(), ret)
+    return ret
+
+
+def _parse_stat(data):
+    """Parse /proc/[pid]/stat content into a pre-converted
+    (name, tty_nr, utime, stime, starttime) tuple; these are the only
+    fields any Process method consumes.  Converting them here rather
+    than at the call sites means the work is done once and shared by
+    name(), terminal(), cpu_times() and create_time() whenever the
+    cache is enabled (utime/stime/starttime are already expressed in
+    seconds).
+    """
+    data = data.strip()
+    # the name is everything between the first '(' and the last ')';
+    # index()/rindex() are memchr/memrchr-backed single scans, cheaper
+    # than split() + two replace() passes, and also get names which
+    # themselves contain spaces or parentheses right
+    rpar = data.rindex(b(')'))
+    name = data[data.index(b('(')) + 1:rpar]
+    # ignore the "pid (name)" prefix; no field past starttime
+    # (index 19) is ever used so the split is capped there
+    fields = data[rpar + 2:].split(b(' '), 20)
+    return (name,
+            int(fields[4]),                 # tty_nr
+            float(fields[11]) * TICK_INV,   # utime
+            float(fields[12]) * TICK_INV,   # stime
+            float(fields[19]) * TICK_INV)   # starttime
+
+
+def _parse_status(data):
+    """Parse /proc/[pid]/status content into a {field: value} dict
+    (both keys and values are bytes; values are stripped).
+    """
+    ret = {}
+    SEP = b(':')
+    for line in data.splitlines():
+        i = line.find(SEP)
+        if i > 0:
+            ret[line[:i]] = line[i + 1:].strip()
+    return ret
+
+
+def _parse_statm(data):
+    """Parse /proc/[pid]/statm content into a tuple of memory
+    amounts expressed in bytes.
+    """
+    return tuple([int(x) * PAGESIZE for x in data.split(None, 7)[:7]])
+
+
 # --- decorators
 
 def wrap_exceptions(fun):
@@ -697,9 +944,9 @@ def wrap_exceptions(fun):
             # ESRCH (no such process) can get raised on read() if
             # process is gone in meantime.
             err = sys.exc_info()[1]
-            if err.errno in (errno.ENOENT, errno.ESRCH):
+            if err.errno in (_ENOENT, _ESRCH):
                 raise NoSuchProcess(self.pid, self._name)
-            if err.errno in (errno.EPERM, errno.EACCES):
+            if err.errno in (_EPERM, _EACCES):
                 raise AccessDenied(self.pid, self._name)
             raise
     return wrapper
@@ -708,75 +955,108 @@ def wrap_exceptions(fun):
 class Process(object):
     """Linux process implementation."""
 
-    __slots__ = ["pid", "_name"]
+    __slots__ = ["pid", "_name", "_procfs_path"]
 
     def __init__(self, pid):
         self.pid = pid
         self._name = None
+        # hot methods build "/proc/<pid>/..." paths on every call;
+        # formatting the pid once here leaves them a cheap concat
+        self._procfs_path = "/proc/%s" % pid
+
+    def _reraise(self):
+        """Cold path of the try/except blocks hand-inlined in the
+        hottest methods; translates the EnvironmentError currently
+        being handled into NoSuchProcess or AccessDenied, exactly as
+        wrap_exceptions does.  Inlining the try/except avoids the
+        decorator's extra function call and frame on every invocation.
+        """
+        # sys.exc_info() instead of "except ... as err" in order to
+        # support Python 2.4 / 2.5
+        err = sys.exc_info()[1]
+        # support for private module import
+        if NoSuchProcess is None or AccessDenied is None:
+            raise
+        # ENOENT (no such file or directory) gets raised on open().
+        # ESRCH (no such process) can get raised on read() if
+        # process is gone in meantime.
+        if err.errno in (_ENOENT, _ESRCH):
+            raise NoSuchProcess(self.pid, self._name)
+        if err.errno in (_EPERM, _EACCES):
+            raise AccessDenied(self.pid, self._name)
+        raise
 
-    @wrap_exceptions
     def name(self):
-        fname = "/proc/%s/stat" % self.pid
-        if PY3:
-            f = open(fname, "rt", encoding=DEFAULT_ENCODING)
-        else:
-            f = open(fname, "rt")
         try:
-            name = f.read().split(' ')[1].replace('(', '').replace(')', '')
-        finally:
-            f.close()
+            name = _read_proc_file(self.pid, "stat", _parse_stat)[0]
+        except EnvironmentError:
+            self._reraise()
+        if PY3:
+            name = name.decode(DEFAULT_ENCODING)
         # XXX - gets changed later and probably needs refactoring
         return name
 
     def exe(self):
         try:
-            exe = os.readlink("/proc/%s/exe" % self.pid)
+            exe = os.readlink(self._procfs_path + "/exe")
         except (OSError, IOError):
             err = sys.exc_info()[1]
-            if err.errno in (errno.ENOENT, errno.ESRCH):
+            if err.errno in (_ENOENT, _ESRCH):
                 # no such file error; might be raised also if the
                 # path actually exists for system processes with
                 # low pids (about 0-20)
-                if os.path.lexists("/proc/%s" % self.pid):
+                if os.path.lexists(self._procfs_path):
                     return ""
                 else:
                     # ok, it is a process which has gone away
                     raise NoSuchProcess(self.pid, self._name)
-            if err.errno in (errno.EPERM, errno.EACCES):
+            if err.errno in (_EPERM, _EACCES):
                 raise AccessDenied(self.pid, self._name)
             raise
 
-        # readlink() might return paths containing null bytes ('\x00').
+        # readlink() might return paths containing null bytes ('\x00');
+        # that's rare enough that checking first avoids allocating a
+        # new string on the common path.
         # Certain names have ' (deleted)' appended. Usually this is
         # bogus as the file actually exists. Either way that's not
         # important as we don't want to discriminate executables which
         # have been deleted.
-        exe = exe.split('\x00')[0]
-        if exe.endswith(' (deleted)') and not os.path.exists(exe):
+        if '\x00' in exe:
+            exe = exe[:exe.index('\x00')]
+        if exe[-10:] == ' (deleted)' and not os.path.exists(exe):
             exe = exe[:-10]
         return exe
 
     @wrap_exceptions
     def cmdline(self):
-        fname = "/proc/%s/cmdline" % self.pid
-        if PY3:
-            f = open(fname, "rt", encoding=DEFAULT_ENCODING)
-        else:
-            f = open(fname, "rt")
+        # a single os.read() is enough for any sane cmdline and skips
+        # the BufferedReader machinery; this runs for every process on
+        # every sample in "ps"-like loops
+        fd = os.open(self._procfs_path + "/cmdline",
+                     os.O_RDONLY | O_CLOEXEC)
         try:
-            # return the args as a list
-            return [x for x in f.read().split('\x00') if x]
+            data = os.read(fd, 65536)
+            if len(data) == 65536:
+                # huge cmdline; keep reading until EOF
+                chunks = [data]
+                while 1:
+                    chunk = os.read(fd, 65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                data = b('').join(chunks)
         finally:
-            f.close()
+            os.close(fd)
+        if PY3:
+            data = data.decode(DEFAULT_ENCODING)
+        # return the args as a list; the trailing NUL is removed in
+        # one shot instead of making the comprehension filter it
+        return [x for x in data.rstrip('\x00').split('\x00') if x]
 
     @wrap_exceptions
     def terminal(self):
         tmap = _psposix._get_terminal_map()
-        f = open("/proc/%s/stat" % self.pid, 'rb')
-        try:
-            tty_nr = int(f.read().split(b(' '))[6])
-        finally:
-            f.close()
+        tty_nr = _read_proc_file(self.pid, "stat", _parse_stat)[1]
         try:
             return tmap[tty_nr]
         except KeyError:
@@ -785,46 +1065,32 @@ class Process(object):
     if os.path.exists('/proc/%s/io' % os.getpid()):
         @wrap_exceptions
         def io_counters(self):
-            fname = "/proc/%s/io" % self.pid
-            f = open(fname, 'rb')
-            SYSCR, SYSCW = b("syscr"), b("syscw")
-            READ_BYTES, WRITE_BYTES = b("read_bytes"), b("write_bytes")
+            fname = self._procfs_path + "/io"
+            # the file is 7 short lines; a single raw os.read() plus
+            # one regex search over the buffer beats the buffered
+            # reader and a per-line prefix comparison loop
+            fd = os.open(fname, os.O_RDONLY | O_CLOEXEC)
             try:
-                rcount = wcount = rbytes = wbytes = None
-                for line in f:
-                    if rcount is None and line.startswith(SYSCR):
-                        rcount = int(line.split()[1])
-                    elif wcount is None and line.startswith(SYSCW):
-                        wcount = int(line.split()[1])
-                    elif rbytes is None and line.startswith(READ_BYTES):
-                        rbytes = int(line.split()[1])
-                    elif wbytes is None and line.startswith(WRITE_BYTES):
-                        wbytes = int(line.split()[1])
-                for x in (rcount, wcount, rbytes, wbytes):
-                    if x is None:
-                        raise NotImplementedError(
-                            "couldn't read all necessary info from %r" % fname)
-                return _common.pio(rcount, wcount, rbytes, wbytes)
+                data = os.read(fd, 1024)
             finally:
-                f.close()
+                os.close(fd)
+            m = _PROC_IO_RE.search(data)
+            if m is None:
+                raise NotImplementedError(
+                    "couldn't read all necessary info from %r" % fname)
+            return _pio((int(m.group(1)), int(m.group(2)),
+                         int(m.group(3)), int(m.group(4))))
     else:
         def io_counters(self):
             raise NotImplementedError("couldn't find /proc/%s/io (kernel "
                                       "too old?)" % self.pid)
 
-    @wrap_exceptions
     def cpu_times(self):
-        f = open("/proc/%s/stat" % self.pid, 'rb')
         try:
-            st = f.read().strip()
-        finally:
-            f.close()
-        # ignore the first two values ("pid (exe)")
-        st = st[st.find(b(')')) + 2:]
-        values = st.split(b(' '))
-        utime = float(values[11]) / CLOCK_TICKS
-        stime = float(values[12]) / CLOCK_TICKS
-        return _common.pcputimes(utime, stime)
+            stat = _read_proc_file(self.pid, "stat", _parse_stat)
+        except EnvironmentError:
+            self._reraise()
+        return _pcputimes(stat[2:4])
 
     @wrap_exceptions
     def wait(self, timeout=None):
@@ -836,33 +1102,24 @@ class Process(object):
                 raise
             raise TimeoutExpired(timeout, self.pid, self._name)
 
-    @wrap_exceptions
     def create_time(self):
-        f = open("/proc/%s/stat" % self.pid, 'rb')
         try:
-            st = f.read().strip()
-        finally:
-            f.close()
-        # ignore the first two values ("pid (exe)")
-        st = st[st.rfind(b(')')) + 2:]
-        values = st.split(b(' '))
+            starttime = _read_proc_file(self.pid, "stat", _parse_stat)[4]
+        except EnvironmentError:
+            self._reraise()
         # According to documentation, starttime is in field 21 and the
-        # unit is jiffies (clock ticks).
-        # We first divide it for clock ticks and then add uptime returning
-        # seconds since the epoch, in UTC.
-        # Also use cached value if available.
+        # unit is jiffies (clock ticks); _parse_stat already converted
+        # it to seconds, so adding the boot time yields seconds since
+        # the epoch, in UTC.  Also use cached value if available.
         bt = BOOT_TIME or boot_time()
-        return (float(values[19]) / CLOCK_TICKS) + bt
+        return starttime + bt
 
-    @wrap_exceptions
     def memory_info(self):
-        f = open("/proc/%s/statm" % self.pid, 'rb')
         try:
-            vms, rss = f.readline().split()[:2]
-            return _common.pmem(int(rss) * PAGESIZE,
-                                int(vms) * PAGESIZE)
-        finally:
-            f.close()
+            vms, rss = _read_proc_file(self.pid, "statm", _parse_statm)[:2]
+        except EnvironmentError:
+            self._reraise()
+        return _pmem((rss, vms))
 
     @wrap_exceptions
     def memory_info_ex(self):
@@ -877,12 +1134,8 @@ class Process(object):
         # | data   | data + stack                        | drs  | DATA |
         # | dirty  | dirty pages (unused in Linux 2.6)   | dt   |      |
         #  ============================================================
-        f = open("/proc/%s/statm" % self.pid, "rb")
-        try:
-            vms, rss, shared, text, lib, data, dirty = \
-                [int(x) * PAGESIZE for x in f.readline().split()[:7]]
-        finally:
-            f.close()
+        vms, rss, shared, text, lib, data, dirty = \
+            _read_proc_file(self.pid, "statm", _parse_statm)
         return pextmem(rss, vms, shared, text, lib, data, dirty)
 
     if os.path.exists('/proc/%s/smaps' % os.getpid()):
@@ -891,25 +1144,57 @@ class Process(object):
             Fields are explained in 'man proc'; here is an updated (Apr 2012)
             version: http://goo.gl/fmebo
             """
-            f = None
             try:
-                f = open("/proc/%s/smaps" % self.pid, "rt")
-                first_line = f.readline()
+                # slurp the whole file upfront with as few read()
+                # syscalls as possible: iterating a buffered file
+                # object pays a Python-level readline() and a str
+                # object per line and smaps files can be tens of
+                # thousands of lines long; /proc files don't report
+                # a size so a read loop is needed
+                fd = os.open(self._procfs_path + "/smaps",
+                             os.O_RDONLY | O_CLOEXEC)
+                try:
+                    chunks = []
+                    while 1:
+                        chunk = os.read(fd, 1048576)
+                        if not chunk:
+                            break
+                        chunks.append(chunk)
+                finally:
+                    os.close(fd)
+                data = b('').join(chunks)
+                if PY3:
+                    data = data.decode(DEFAULT_ENCODING)
+                lines = data.splitlines()
+                if lines:
+                    first_line = lines[0]
+                else:
+                    first_line = ''
                 current_block = [first_line]
 
                 def get_blocks():
                     data = {}
-                    for line in f:
-                        fields = line.split(None, 5)
-                        if not fields[0].endswith(':'):
+                    for line in lines[1:]:
+                        # field lines ("Rss: 4 kB") start with an
+                        # uppercase field name while header lines
+                        # start with a lowercase hex address, so one
+                        # character is enough to tell them apart
+                        if not line[:1].isupper():
                             # new block section
                             yield (current_block.pop(), data)
                             current_block.append(line)
                         else:
+                            # partition() extracts the one field we
+                            # need without building a token list per
+                            # line; int() tolerates the surrounding
+                            # whitespace
+                            key, _, value = line.partition(':')
+                            if value.endswith(' kB'):
+                                value = value[:-3]
                             try:
-                                data[fields[0]] = int(fields[1]) * 1024
+                                data[key + ':'] = int(value) * 1024
                             except ValueError:
-                                if fields[0].startswith('VmFlags:'):
+                                if key == 'VmFlags':
                                     # see issue #369
                                     continue
                                 else:
@@ -940,24 +1225,16 @@ class Process(object):
                                data.get('Referenced:', 0),
                                data.get('Anonymous:', 0),
                                data.get('Swap:', 0))
-                f.close()
             except EnvironmentError:
                 # XXX - Can't use wrap_exceptions decorator as we're
                 # returning a generator;  this probably needs some
                 # refactoring in order to avoid this code duplication.
-                if f is not None:
-                    f.close()
                 err = sys.exc_info()[1]
-                if err.errno in (errno.ENOENT, errno.ESRCH):
+                if err.errno in (_ENOENT, _ESRCH):
                     raise NoSuchProcess(self.pid, self._name)
-                if err.errno in (errno.EPERM, errno.EACCES):
+                if err.errno in (_EPERM, _EACCES):
                     raise AccessDenied(self.pid, self._name)
                 raise
-            except:
-                if f is not None:
-                    f.close()
-                raise
-            f.close()
 
     else:
         def memory_maps(self, ext):
@@ -970,74 +1247,89 @@ class Process(object):
     def cwd(self):
         # readlink() might return paths containing null bytes causing
         # problems when used with other fs-related functions (os.*,
-        # open(), ...)
-        path = os.readlink("/proc/%s/cwd" % self.pid)
-        return path.replace('\x00', '')
+        # open(), ...); as in exe(), only scrub them when actually
+        # present so the common case allocates nothing
+        path = os.readlink(self._procfs_path + "/cwd")
+        if '\x00' in path:
+            path = path.replace('\x00', '')
+        return path
 
-    @wrap_exceptions
     def num_ctx_switches(self):
-        vol = unvol = None
-        f = open("/proc/%s/status" % self.pid, "rb")
-        VOLUNTARY = b("voluntary_ctxt_switches")
-        NON_VOLUNTARY = b("nonvoluntary_ctxt_switches")
         try:
-            for line in f:
-                if line.startswith(VOLUNTARY):
-                    vol = int(line.split()[1])
-                elif line.startswith(NON_VOLUNTARY):
-                    unvol = int(line.split()[1])
-                if vol is not None and unvol is not None:
-                    return _common.pctxsw(vol, unvol)
+            fields = _read_proc_file(self.pid, "status", _parse_status)
+        except EnvironmentError:
+            self._reraise()
+        try:
+            vol = int(fields[b("voluntary_ctxt_switches")])
+            unvol = int(fields[b("nonvoluntary_ctxt_switches")])
+        except KeyError:
             raise NotImplementedError(
                 "'voluntary_ctxt_switches' and 'nonvoluntary_ctxt_switches'"
                 "fields were not found in /proc/%s/status; the kernel is "
                 "probably older than 2.6.23" % self.pid)
-        finally:
-            f.close()
+        return _pctxsw((vol, unvol))
 
-    @wrap_exceptions
     def num_threads(self):
-        f = open("/proc/%s/status" % self.pid, "rb")
         try:
-            THREADS = b("Threads:")
-            for line in f:
-                if line.startswith(THREADS):
-                    return int(line.split()[1])
+            fields = _read_proc_file(self.pid, "status", _parse_status)
+        except EnvironmentError:
+            self._reraise()
+        try:
+            return int(fields[b("Threads")])
+        except KeyError:
             raise NotImplementedError("line not found")
-        finally:
-            f.close()
 
     @wrap_exceptions
     def threads(self):
-        thread_ids = os.listdir("/proc/%s/task" % self.pid)
-        thread_ids.sort()
+        path = self._procfs_path + "/task"
+        thread_ids = os.listdir(path)
         retlist = []
         hit_enoent = False
-        for thread_id in thread_ids:
-            try:
-                f = open("/proc/%s/task/%s/stat" % (self.pid, thread_id), 'rb')
-            except EnvironmentError:
-                err = sys.exc_info()[1]
-                if err.errno == errno.ENOENT:
-                    # no such file or directory; it means thread
-                    # disappeared on us
-                    hit_enoent = True
-                    continue
-                raise
-            try:
-                st = f.read().strip()
-            finally:
-                f.close()
-            # ignore the first two values ("pid (exe)")
-            st = st[st.find(b(')')) + 2:]
-            values = st.split(b(' '))
-            utime = float(values[11]) / CLOCK_TICKS
-            stime = float(values[12]) / CLOCK_TICKS
-            ntuple = _common.pthread(int(thread_id), utime, stime)
-            retlist.append(ntuple)
+        # Each per-thread stat file is read through a raw fd with a
+        # single read() syscall: no BufferedReader gets allocated per
+        # thread and, where openat() is available, the path lookup is
+        # done relative to the already resolved task directory.
+        if HAS_DIR_FD:
+            dir_fd = os.open(path, os.O_RDONLY | O_CLOEXEC)
+        else:
+            dir_fd = None
+        try:
+            for thread_id in thread_ids:
+                try:
+                    if dir_fd is not None:
+                        fd = os.open("%s/stat" % thread_id,
+                                     os.O_RDONLY | O_CLOEXEC, dir_fd=dir_fd)
+                    else:
+                        fd = os.open("%s/%s/stat" % (path, thread_id),
+                                     os.O_RDONLY | O_CLOEXEC)
+                except EnvironmentError:
+                    err = sys.exc_info()[1]
+                    if err.errno == _ENOENT:
+                        # no such file or directory; it means thread
+                        # disappeared on us
+                        hit_enoent = True
+                        continue
+                    raise
+                try:
+                    st = os.read(fd, 1024).strip()
+                finally:
+                    os.close(fd)
+                # ignore the first two values ("pid (exe)"); fields past
+                # stime (index 12) are never used
+                st = st[st.find(b(')')) + 2:]
+                values = st.split(b(' '), 13)
+                utime = float(values[11]) * TICK_INV
+                stime = float(values[12]) * TICK_INV
+                ntuple = _pthread((int(thread_id), utime, stime))
+                retlist.append(ntuple)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
         if hit_enoent:
-            # raise NSP if the process disappeared on us
-            os.stat('/proc/%s' % self.pid)
+            # raise NSP if the process disappeared on us; access(F_OK)
+            # is cheaper than stat() as no stat buffer gets filled
+            if not os.access(self._procfs_path, os.F_OK):
+                raise NoSuchProcess(self.pid, self._name)
         return retlist
 
     @wrap_exceptions
@@ -1058,9 +1350,17 @@ class Process(object):
 
     @wrap_exceptions
     def cpu_affinity_get(self):
-        from_bitmask = lambda x: [i for i in xrange(64) if (1 << i) & x]
         bitmask = cext.proc_cpu_affinity_get(self.pid)
-        return from_bitmask(bitmask)
+        # consume the mask right-to-left, stopping at the highest
+        # set bit instead of blindly testing all 64 positions
+        cpus = []
+        cpu = 0
+        while bitmask:
+            if bitmask & 1:
+                cpus.append(cpu)
+            bitmask >>= 1
+            cpu += 1
+        return cpus
 
     @wrap_exceptions
     def cpu_affinity_set(self, cpus):
@@ -1127,96 +1427,68 @@ class Process(object):
 
     @wrap_exceptions
     def status(self):
-        f = open("/proc/%s/status" % self.pid, 'rb')
-        try:
-            STATE = b("State:")
-            for line in f:
-                if line.startswith(STATE):
-                    letter = line.split()[1]
-                    if PY3:
-                        letter = letter.decode()
-                    # XXX is '?' legit? (we're not supposed to return
-                    # it anyway)
-                    return PROC_STATUSES.get(letter, '?')
-        finally:
-            f.close()
+        letter = _status_fields(self.pid)[0]
+        # XXX is '?' legit? (we're not supposed to return
+        # it anyway)
+        return PROC_STATUSES.get(letter, '?')
+
+    def _scan_fds(self):
+        """Walk /proc/[pid]/fd in C (directory scan, symlink
+        resolution and regular-file check against a single directory
+        fd) and return a list of (fd, target, isreg) tuples.
+        While the opt-in proc cache is active (as_dict()) the scan is
+        reused for up to PROC_CACHE_TTL seconds, so callers asking
+        for both open_files() and connections() pay for one directory
+        walk instead of two.
+        """
+        if _proc_cache_users:
+            entry = _proc_cache.get((self.pid, "fd_scan"))
+            if entry is not None and (_timer() - entry[0]) < PROC_CACHE_TTL:
+                return entry[1]
+        ret = cext.proc_fd_list(self.pid)
+        if _proc_cache_users:
+            _proc_cache[(self.pid, "fd_scan")] = (_timer(), ret)
+        return ret
 
     @wrap_exceptions
     def open_files(self):
-        retlist = []
-        files = os.listdir("/proc/%s/fd" % self.pid)
-        hit_enoent = False
-        for fd in files:
-            file = "/proc/%s/fd/%s" % (self.pid, fd)
-            if os.path.islink(file):
-                try:
-                    file = os.readlink(file)
-                except OSError:
-                    # ENOENT == file which is gone in the meantime
-                    err = sys.exc_info()[1]
-                    if err.errno in (errno.ENOENT, errno.ESRCH):
-                        hit_enoent = True
-                        continue
-                    raise
-                else:
-                    # If file is not an absolute path there's no way
-                    # to tell whether it's a regular file or not,
-                    # so we skip it. A regular file is always supposed
-                    # to be absolutized though.
-                    if file.startswith('/') and isfile_strict(file):
-                        ntuple = _common.popenfile(file, int(fd))
-                        retlist.append(ntuple)
-        if hit_enoent:
-            # raise NSP if the process disappeared on us
-            os.stat('/proc/%s' % self.pid)
-        return retlist
+        # a single comprehension builds the list in one shot instead
+        # of growing it append by append
+        return [_common.popenfile(file, fd)
+                for fd, file, isreg in self._scan_fds() if isreg]
 
     @wrap_exceptions
     def connections(self, kind='inet'):
-        ret = _connections.retrieve(kind, self.pid)
-        # raise NSP if the process disappeared on us
-        os.stat('/proc/%s' % self.pid)
+        if _proc_cache_users:
+            # share the full fd scan with open_files()
+            ret = _connections.retrieve(kind, self.pid,
+                                        fd_list=self._scan_fds())
+        else:
+            # a standalone call is cheaper through the socket-only
+            # scan, whose readlinks stop at the short "socket:[...]"
+            # targets and which never stats file-backed fds
+            ret = _connections.retrieve(kind, self.pid)
+        # raise NSP if the process disappeared on us; access(F_OK)
+        # is cheaper than stat() as no stat buffer gets filled
+        if not os.access(self._procfs_path, os.F_OK):
+            raise NoSuchProcess(self.pid, self._name)
         return ret
 
     @wrap_exceptions
     def num_fds(self):
-        return len(os.listdir("/proc/%s/fd" % self.pid))
+        # counted in C with getdents64; no intermediate name list
+        return cext.proc_num_fds(self.pid)
 
     @wrap_exceptions
     def ppid(self):
-        f = open("/proc/%s/status" % self.pid, 'rb')
-        try:
-            PPID = b("PPid:")
-            for line in f:
-                if line.startswith(PPID):
-                    # PPid: nnnn
-                    return int(line.split()[1])
-            raise NotImplementedError("line not found")
-        finally:
-            f.close()
+        return _status_fields(self.pid)[1]
 
     @wrap_exceptions
     def uids(self):
-        f = open("/proc/%s/status" % self.pid, 'rb')
-        try:
-            UID = b('Uid:')
-            for line in f:
-                if line.startswith(UID):
-                    _, real, effective, saved, fs = line.split()
-                    return _common.puids(int(real), int(effective), int(saved))
-            raise NotImplementedError("line not found")
-        finally:
-            f.close()
+        fields = _status_fields(self.pid)
+        return _common.puids(fields[2], fields[3], fields[4])
 
     @wrap_exceptions
     def gids(self):
-        f = open("/proc/%s/status" % self.pid, 'rb')
-        try:
-            GID = b('Gid:')
-            for line in f:
-                if line.startswith(GID):
-                    _, real, effective, saved, fs = line.split()
-                    return _common.pgids(int(real), int(effective), int(saved))
-            raise NotImplementedError("line not found")
-        finally:
-            f.close()
+        fields = _status_fields(self.pid)
+        return _common.pgids(fields[5], fields[6], fields[7])
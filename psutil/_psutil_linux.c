@@ -12,6 +12,11 @@
 #include <Python.h>
 #include <errno.h>
 #include <stdlib.h>
+#include <string.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <limits.h>
+#include <sys/stat.h>
 #include <mntent.h>
 #include <features.h>
 #include <utmp.h>
@@ -330,6 +335,581 @@ error:
 }
 
 
+// matches the kernel's linux_dirent64 layout, used with the raw
+// getdents64 syscall below; glibc doesn't expose a wrapper
+struct psutil_dirent64 {
+    unsigned long long d_ino;
+    long long          d_off;
+    unsigned short     d_reclen;
+    unsigned char      d_type;
+    char               d_name[1];
+};
+
+
+/*
+ * Walk /proc/<pid>/fd once and return a (fd, target, isreg) tuple
+ * per descriptor, where 'target' is the link target ("/some/file",
+ * "socket:[12345]", "pipe:[678]", ...) and 'isreg' tells whether the
+ * descriptor refers to a regular file.  /proc/<pid>/fd is opened
+ * once and everything else works relative to that directory fd:
+ * getdents64 with a 32 KiB buffer for the entries, then readlinkat()
+ * (+ stat() of the target for absolute targets) per entry.  The
+ * target is deliberately stat()ed by path rather than through the
+ * /proc magic link: a deleted-but-open file must not be reported as
+ * a regular file, same as the old isfile_strict() check.
+ * Both open_files()
+ * and the per-process connections() path filter this single scan, so
+ * callers needing both pay for one directory walk instead of two.
+ */
+static PyObject *
+psutil_proc_fd_list(PyObject *self, PyObject *args)
+{
+    long pid;
+    int dfd = -1;
+    int nread, pos;
+    int isreg;
+    int hit_enoent = 0;
+    char dpath[64];
+    char buf[32768];
+    char lpath[PATH_MAX + 1];
+    ssize_t llen;
+    struct psutil_dirent64 *entry;
+    struct stat st;
+    PyObject *py_retlist = PyList_New(0);
+    PyObject *py_tuple = NULL;
+    PyObject *py_path = NULL;
+
+    if (py_retlist == NULL)
+        return NULL;
+    if (! PyArg_ParseTuple(args, "l", &pid))
+        goto error;
+    sprintf(dpath, "/proc/%ld/fd", pid);
+    dfd = open(dpath, O_RDONLY | O_DIRECTORY | O_CLOEXEC);
+    if (dfd == -1) {
+        PyErr_SetFromErrno(PyExc_OSError);
+        goto error;
+    }
+    for (;;) {
+        nread = syscall(SYS_getdents64, dfd, buf, sizeof(buf));
+        if (nread == -1) {
+            PyErr_SetFromErrno(PyExc_OSError);
+            goto error;
+        }
+        if (nread == 0)
+            break;
+        for (pos = 0; pos < nread; pos += entry->d_reclen) {
+            entry = (struct psutil_dirent64 *)(buf + pos);
+            if (entry->d_name[0] == '.')
+                continue;  // "." and ".."
+            llen = readlinkat(dfd, entry->d_name, lpath,
+                              sizeof(lpath) - 1);
+            if (llen == -1) {
+                // fd gone in the meantime
+                hit_enoent = 1;
+                continue;
+            }
+            lpath[llen] = '\0';
+            // sockets, pipes and friends resolve to "type:[inode]"
+            // forms; only absolute targets can be regular files
+            isreg = 0;
+            if (lpath[0] == '/') {
+                if (stat(lpath, &st) == 0) {
+                    isreg = S_ISREG(st.st_mode);
+                }
+                else if (errno == EPERM || errno == EACCES) {
+                    PyErr_SetFromErrno(PyExc_OSError);
+                    goto error;
+                }
+                // ENOENT: the target is gone (or the fd points at a
+                // deleted file); keep the entry with isreg == 0
+            }
+            // decode with the fs encoding + surrogateescape, same as
+            // os.readlink(); "s" would choke on non-UTF-8 file names
+#if PY_MAJOR_VERSION >= 3
+            py_path = PyUnicode_DecodeFSDefaultAndSize(lpath, llen);
+#else
+            py_path = PyString_FromStringAndSize(lpath, llen);
+#endif
+            if (! py_path)
+                goto error;
+            py_tuple = Py_BuildValue("(iOi)", atoi(entry->d_name),
+                                     py_path, isreg);
+            if (! py_tuple)
+                goto error;
+            if (PyList_Append(py_retlist, py_tuple))
+                goto error;
+            Py_DECREF(py_tuple);
+            py_tuple = NULL;
+            Py_DECREF(py_path);
+            py_path = NULL;
+        }
+    }
+    close(dfd);
+    dfd = -1;
+    if (hit_enoent) {
+        // make sure the process is still there, else the caller
+        // raises NoSuchProcess
+        sprintf(dpath, "/proc/%ld", pid);
+        if (stat(dpath, &st) != 0) {
+            PyErr_SetFromErrno(PyExc_OSError);
+            goto error;
+        }
+    }
+    return py_retlist;
+
+error:
+    if (dfd != -1)
+        close(dfd);
+    Py_XDECREF(py_tuple);
+    Py_XDECREF(py_path);
+    Py_DECREF(py_retlist);
+    return NULL;
+}
+
+
+/*
+ * Return the number of entries in /proc/<pid>/fd.  Uses getdents64
+ * with the same 32 KiB buffer as proc_open_files and only counts the
+ * records, so no name list is ever materialized the way
+ * os.listdir() + len() does it.
+ */
+static PyObject *
+psutil_proc_num_fds(PyObject *self, PyObject *args)
+{
+    long pid;
+    int dfd = -1;
+    int nread, pos;
+    long count = 0;
+    char dpath[64];
+    char buf[32768];
+    struct psutil_dirent64 *entry;
+
+    if (! PyArg_ParseTuple(args, "l", &pid))
+        return NULL;
+    sprintf(dpath, "/proc/%ld/fd", pid);
+    dfd = open(dpath, O_RDONLY | O_DIRECTORY | O_CLOEXEC);
+    if (dfd == -1)
+        return PyErr_SetFromErrno(PyExc_OSError);
+    for (;;) {
+        nread = syscall(SYS_getdents64, dfd, buf, sizeof(buf));
+        if (nread == -1) {
+            close(dfd);
+            return PyErr_SetFromErrno(PyExc_OSError);
+        }
+        if (nread == 0)
+            break;
+        for (pos = 0; pos < nread; pos += entry->d_reclen) {
+            entry = (struct psutil_dirent64 *)(buf + pos);
+            if (entry->d_name[0] != '.')
+                count++;
+        }
+    }
+    close(dfd);
+    return Py_BuildValue("l", count);
+}
+
+
+/*
+ * Return the sockets opened by a process as a list of (inode, fd)
+ * tuples, with 'inode' being the decimal string from the
+ * "socket:[inode]" link target.  Like proc_open_files this works
+ * relative to a single /proc/<pid>/fd directory fd, but link targets
+ * are read into a 32 byte buffer: socket links always fit, and
+ * anything else is recognizable (no "socket:[" prefix) from the
+ * truncated head alone, so the kernel never copies out a full path
+ * for the fds we don't care about.
+ */
+static PyObject *
+psutil_proc_socket_inodes(PyObject *self, PyObject *args)
+{
+    long pid;
+    int dfd = -1;
+    int nread, pos;
+    char dpath[64];
+    char buf[32768];
+    char lpath[32];
+    char *rbracket;
+    ssize_t llen;
+    struct psutil_dirent64 *entry;
+    PyObject *py_retlist = PyList_New(0);
+    PyObject *py_tuple = NULL;
+
+    if (py_retlist == NULL)
+        return NULL;
+    if (! PyArg_ParseTuple(args, "l", &pid))
+        goto error;
+    sprintf(dpath, "/proc/%ld/fd", pid);
+    dfd = open(dpath, O_RDONLY | O_DIRECTORY | O_CLOEXEC);
+    if (dfd == -1) {
+        PyErr_SetFromErrno(PyExc_OSError);
+        goto error;
+    }
+    for (;;) {
+        nread = syscall(SYS_getdents64, dfd, buf, sizeof(buf));
+        if (nread == -1) {
+            PyErr_SetFromErrno(PyExc_OSError);
+            goto error;
+        }
+        if (nread == 0)
+            break;
+        for (pos = 0; pos < nread; pos += entry->d_reclen) {
+            entry = (struct psutil_dirent64 *)(buf + pos);
+            if (entry->d_name[0] == '.')
+                continue;  // "." and ".."
+            llen = readlinkat(dfd, entry->d_name, lpath,
+                              sizeof(lpath) - 1);
+            if (llen == -1)
+                continue;  // fd gone in the meantime
+            lpath[llen] = '\0';
+            if (strncmp(lpath, "socket:[", 8) != 0)
+                continue;
+            rbracket = strchr(lpath + 8, ']');
+            if (rbracket == NULL)
+                continue;
+            *rbracket = '\0';
+            py_tuple = Py_BuildValue("(si)", lpath + 8,
+                                     atoi(entry->d_name));
+            if (! py_tuple)
+                goto error;
+            if (PyList_Append(py_retlist, py_tuple))
+                goto error;
+            Py_DECREF(py_tuple);
+        }
+    }
+    close(dfd);
+    return py_retlist;
+
+error:
+    if (dfd != -1)
+        close(dfd);
+    Py_XDECREF(py_tuple);
+    Py_DECREF(py_retlist);
+    return NULL;
+}
+
+
+/*
+ * Read /proc/diskstats in one go and return a list of
+ * (name, reads, writes, rsect, wsect, rtime, wtime) tuples, one per
+ * block device, with the counters parsed by strtoull().  Figuring out
+ * which entries are interesting (disks vs partitions) is left to
+ * Python; sector counts are returned raw.
+ */
+static PyObject *
+psutil_disk_io_counters(PyObject *self, PyObject *args)
+{
+    int fd = -1;
+    int i;
+    char *buf = NULL;
+    char *newbuf;
+    char *p, *end, *eol, *name;
+    size_t size = 65536;
+    size_t len = 0;
+    ssize_t n;
+    unsigned long long fields[8];
+    PyObject *py_retlist = PyList_New(0);
+    PyObject *py_tuple = NULL;
+
+    if (py_retlist == NULL)
+        return NULL;
+    fd = open("/proc/diskstats", O_RDONLY);
+    if (fd == -1) {
+        PyErr_SetFromErrno(PyExc_OSError);
+        goto error;
+    }
+    buf = malloc(size);
+    if (buf == NULL) {
+        PyErr_NoMemory();
+        goto error;
+    }
+    // /proc files don't report a size so we read until EOF, doubling
+    // the buffer if a system with hundreds of LUNs overflows it
+    for (;;) {
+        if (len + 4096 > size) {
+            size *= 2;
+            newbuf = realloc(buf, size);
+            if (newbuf == NULL) {
+                PyErr_NoMemory();
+                goto error;
+            }
+            buf = newbuf;
+        }
+        n = read(fd, buf + len, size - len - 1);
+        if (n < 0) {
+            PyErr_SetFromErrno(PyExc_OSError);
+            goto error;
+        }
+        if (n == 0)
+            break;
+        len += n;
+    }
+    close(fd);
+    fd = -1;
+    buf[len] = '\0';
+
+    p = buf;
+    end = buf + len;
+    while (p < end) {
+        // null-terminate the line so strtoull() can't walk past it on
+        // kernels printing fewer fields
+        eol = memchr(p, '\n', end - p);
+        if (eol == NULL)
+            eol = end;
+        *eol = '\0';
+        // skip major and minor numbers
+        for (i = 0; i < 2; i++) {
+            while (*p == ' ')
+                p++;
+            while (*p != '\0' && *p != ' ')
+                p++;
+        }
+        while (*p == ' ')
+            p++;
+        name = p;
+        while (*p != '\0' && *p != ' ')
+            p++;
+        if (*p != '\0')
+            *p++ = '\0';
+        // reads, reads merged, sectors read, ms reading, writes,
+        // writes merged, sectors written, ms writing; see
+        // Documentation/iostats.txt
+        for (i = 0; i < 8; i++)
+            fields[i] = strtoull(p, &p, 10);
+        py_tuple = Py_BuildValue("(sKKKKKK)",
+                                 name,
+                                 fields[0],   // reads completed
+                                 fields[4],   // writes completed
+                                 fields[2],   // sectors read
+                                 fields[6],   // sectors written
+                                 fields[3],   // time spent reading
+                                 fields[7]);  // time spent writing
+        if (! py_tuple)
+            goto error;
+        if (PyList_Append(py_retlist, py_tuple))
+            goto error;
+        Py_DECREF(py_tuple);
+        p = eol + 1;
+    }
+    free(buf);
+    return py_retlist;
+
+error:
+    if (fd != -1)
+        close(fd);
+    if (buf != NULL)
+        free(buf);
+    Py_XDECREF(py_tuple);
+    Py_DECREF(py_retlist);
+    return NULL;
+}
+
+
+/*
+ * Parse the State, PPid, Uid and Gid lines of /proc/<pid>/status
+ * with one open+read and return a flat (state, ppid, uid_real,
+ * uid_eff, uid_saved, gid_real, gid_eff, gid_saved) tuple, 'state'
+ * being the single status letter.  The lines are located with memmem
+ * and the numbers parsed with strtol, so four Python-level attribute
+ * lookups are served by a single syscall pair.
+ */
+static PyObject *
+psutil_proc_status_fields(PyObject *self, PyObject *args)
+{
+    long pid;
+    int fd = -1;
+    int i;
+    ssize_t n;
+    size_t len = 0;
+    char path[64];
+    char buf[8192];
+    char state[2];
+    char *p;
+    long ppid;
+    long uids[3];
+    long gids[3];
+
+    if (! PyArg_ParseTuple(args, "l", &pid))
+        return NULL;
+    sprintf(path, "/proc/%ld/status", pid);
+    fd = open(path, O_RDONLY);
+    if (fd == -1)
+        return PyErr_SetFromErrno(PyExc_OSError);
+    // the file is well below the buffer size but /proc may hand it
+    // out in more than one chunk
+    for (;;) {
+        n = read(fd, buf + len, sizeof(buf) - len - 1);
+        if (n < 0) {
+            close(fd);
+            return PyErr_SetFromErrno(PyExc_OSError);
+        }
+        if (n == 0)
+            break;
+        len += n;
+        if (len >= sizeof(buf) - 1)
+            break;
+    }
+    close(fd);
+    buf[len] = '\0';
+
+    p = memmem(buf, len, "\nState:", 7);
+    if (p == NULL)
+        goto parse_error;
+    p += 7;
+    while (*p == ' ' || *p == '\t')
+        p++;
+    state[0] = *p;
+    state[1] = '\0';
+
+    p = memmem(buf, len, "\nPPid:", 6);
+    if (p == NULL)
+        goto parse_error;
+    ppid = strtol(p + 6, NULL, 10);
+
+    p = memmem(buf, len, "\nUid:", 5);
+    if (p == NULL)
+        goto parse_error;
+    p += 5;
+    for (i = 0; i < 3; i++)
+        uids[i] = strtol(p, &p, 10);
+
+    p = memmem(buf, len, "\nGid:", 5);
+    if (p == NULL)
+        goto parse_error;
+    p += 5;
+    for (i = 0; i < 3; i++)
+        gids[i] = strtol(p, &p, 10);
+
+    return Py_BuildValue("(slllllll)", state, ppid,
+                         uids[0], uids[1], uids[2],
+                         gids[0], gids[1], gids[2]);
+
+parse_error:
+    PyErr_Format(PyExc_ValueError, "can't parse %s", path);
+    return NULL;
+}
+
+
+/*
+ * Parse a /proc/net/{tcp,tcp6,udp,udp6} file and return a list of
+ * (laddr, raddr, status, inode) string tuples, one per socket row.
+ * The file is slurped with as few read() calls as possible (also
+ * giving a consistent snapshot of a table that mutates under the
+ * reader) and tokenized with a plain pointer walk.  If a dict is
+ * passed as second argument only the rows whose inode is one of its
+ * keys are returned, so when looking at a single process the
+ * uninteresting rows (usually >99% of the table) never reach Python.
+ * Address decoding is left to the caller.
+ */
+static PyObject *
+psutil_parse_proc_net(PyObject *self, PyObject *args)
+{
+    const char *path;
+    int fd = -1;
+    int nt;
+    char *buf = NULL;
+    char *newbuf;
+    char *p, *q, *end, *eol;
+    char *tok[10];
+    size_t size = 65536;
+    size_t len = 0;
+    ssize_t n;
+    PyObject *py_inodes = Py_None;
+    PyObject *py_retlist = PyList_New(0);
+    PyObject *py_tuple = NULL;
+
+    if (py_retlist == NULL)
+        return NULL;
+    if (! PyArg_ParseTuple(args, "s|O", &path, &py_inodes))
+        goto error;
+    if (py_inodes != Py_None && ! PyDict_Check(py_inodes)) {
+        PyErr_Format(PyExc_TypeError, "dict argument expected");
+        goto error;
+    }
+    fd = open(path, O_RDONLY);
+    if (fd == -1) {
+        PyErr_SetFromErrno(PyExc_OSError);
+        goto error;
+    }
+    buf = malloc(size);
+    if (buf == NULL) {
+        PyErr_NoMemory();
+        goto error;
+    }
+    for (;;) {
+        if (len + 4096 > size) {
+            size *= 2;
+            newbuf = realloc(buf, size);
+            if (newbuf == NULL) {
+                PyErr_NoMemory();
+                goto error;
+            }
+            buf = newbuf;
+        }
+        n = read(fd, buf + len, size - len - 1);
+        if (n < 0) {
+            PyErr_SetFromErrno(PyExc_OSError);
+            goto error;
+        }
+        if (n == 0)
+            break;
+        len += n;
+    }
+    close(fd);
+    fd = -1;
+    buf[len] = '\0';
+    end = buf + len;
+
+    // skip the header line
+    p = memchr(buf, '\n', len);
+    p = (p != NULL) ? p + 1 : end;
+    while (p < end) {
+        eol = memchr(p, '\n', end - p);
+        if (eol == NULL)
+            eol = end;
+        *eol = '\0';
+        // index the first 10 whitespace-separated tokens; the
+        // interesting ones are laddr (1), raddr (2), status (3) and
+        // inode (9)
+        q = p;
+        for (nt = 0; nt < 10; nt++) {
+            while (*q == ' ')
+                q++;
+            if (*q == '\0')
+                break;
+            tok[nt] = q;
+            while (*q != '\0' && *q != ' ')
+                q++;
+            if (*q != '\0')
+                *q++ = '\0';
+        }
+        p = eol + 1;
+        if (nt < 10)
+            continue;  // incomplete row
+        if (py_inodes != Py_None &&
+                PyDict_GetItemString(py_inodes, tok[9]) == NULL)
+            continue;  // somebody else's socket
+        py_tuple = Py_BuildValue("(ssss)", tok[1], tok[2], tok[3],
+                                 tok[9]);
+        if (! py_tuple)
+            goto error;
+        if (PyList_Append(py_retlist, py_tuple))
+            goto error;
+        Py_DECREF(py_tuple);
+    }
+    free(buf);
+    return py_retlist;
+
+error:
+    if (fd != -1)
+        close(fd);
+    if (buf != NULL)
+        free(buf);
+    Py_XDECREF(py_tuple);
+    Py_DECREF(py_retlist);
+    return NULL;
+}
+
+
 /*
  * Return currently connected users as a list of tuples.
  */
@@ -395,12 +975,29 @@ PsutilMethods[] =
      "Return process CPU affinity as a Python long (the bitmask)."},
     {"proc_cpu_affinity_set", psutil_proc_cpu_affinity_set, METH_VARARGS,
      "Set process CPU affinity; expects a bitmask."},
+    {"proc_fd_list", psutil_proc_fd_list, METH_VARARGS,
+     "Return the file descriptors opened by a process as a list of "
+     "(fd, target, isreg) tuples"},
+    {"proc_num_fds", psutil_proc_num_fds, METH_VARARGS,
+     "Return the number of file descriptors opened by a process"},
+    {"proc_socket_inodes", psutil_proc_socket_inodes, METH_VARARGS,
+     "Return the sockets opened by a process as a list of "
+     "(inode, fd) tuples"},
+    {"proc_status_fields", psutil_proc_status_fields, METH_VARARGS,
+     "Return the State, PPid, Uid and Gid fields of "
+     "/proc/<pid>/status as a flat tuple"},
 
     // --- system related functions
 
     {"disk_partitions", psutil_disk_partitions, METH_VARARGS,
      "Return disk mounted partitions as a list of tuples including "
      "device, mount point and filesystem type"},
+    {"disk_io_counters", psutil_disk_io_counters, METH_VARARGS,
+     "Return a list of tuples with the raw I/O counters of every "
+     "/proc/diskstats entry"},
+    {"parse_proc_net", psutil_parse_proc_net, METH_VARARGS,
+     "Parse a /proc/net/{tcp,udp}* file into a list of "
+     "(laddr, raddr, status, inode) tuples"},
     {"users", psutil_users, METH_VARARGS,
      "Return currently connected users as a list of tuples"},
 
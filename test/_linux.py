@@ -12,11 +12,12 @@ import re
 import sys
 import time
 
-from test_psutil import POSIX, TOLERANCE, TRAVIS
+from test_psutil import POSIX, TOLERANCE, TRAVIS, TESTFN
 from test_psutil import (skip_on_not_implemented, sh, get_test_subprocess,
                          retry_before_failing, get_kernel_version, unittest)
 
 import psutil
+from psutil._compat import PY3, b
 
 
 class LinuxSpecificTestCase(unittest.TestCase):
@@ -163,6 +164,49 @@ class LinuxSpecificTestCase(unittest.TestCase):
         self.assertTrue(hasattr(psutil, "RLIMIT_RSS"))
         self.assertTrue(hasattr(psutil, "RLIMIT_STACK"))
 
+    def test_open_files_non_utf8_name(self):
+        # a link target whose bytes are not valid UTF-8 must not make
+        # open_files() raise; on Python 3 the path is expected to come
+        # back surrogate-escaped, same as os.readlink() returns it
+        if PY3:
+            encoding = sys.getfilesystemencoding()
+            fname = TESTFN.encode(encoding) + b("-\xc0\x80")
+            expected = fname.decode(encoding, "surrogateescape")
+        else:
+            fname = TESTFN + "-\xc0\x80"
+            expected = fname
+        f = open(fname, 'wb')
+        try:
+            p = psutil.Process(os.getpid())
+            self.assertIn(expected, [x.path for x in p.open_files()])
+        finally:
+            f.close()
+            os.remove(fname)
+
+    def test_open_files_deleted(self):
+        # a file removed while a process still holds it open must not
+        # be reported by open_files()
+        f = open(TESTFN, 'w')
+        try:
+            os.remove(TESTFN)
+            p = psutil.Process(os.getpid())
+            self.assertEqual(
+                [x for x in p.open_files() if x.path.startswith(TESTFN)],
+                [])
+        finally:
+            f.close()
+
+    def test_proc_cache(self):
+        # the parsed /proc/[pid] files cache is enabled during
+        # as_dict() and must be discarded once it returns
+        from psutil import _pslinux
+        p = psutil.Process(os.getpid())
+        d = p.as_dict(attrs=['name', 'cpu_times', 'num_threads'])
+        self.assertEqual(sorted(d.keys()),
+                         ['cpu_times', 'name', 'num_threads'])
+        self.assertEqual(_pslinux._proc_cache, {})
+        self.assertEqual(_pslinux._proc_cache_users, 0)
+
     @unittest.skipUnless(
         get_kernel_version() >= (3, 0),
         "prlimit constants not available on this Linux kernel version")